@@ -2,21 +2,238 @@ import subprocess
 import json
 import time
 import os
+import re
 import argparse
+import functools
+import itertools
 import shlex
+import shutil
+import selectors
 import sys
+import threading
+from contextlib import closing
 from urllib.parse import urlparse
 
 # MCP Protocol Configuration
 MCP_PROTOCOL_VERSION = "2025-06-18"
 
-# Try to import requests, install if not available
+# Capability listings cache (opt-in via --capability-cache)
+DEFAULT_CAPABILITY_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'mcp_caps.sqlite')
+DEFAULT_CACHE_TTL = 3600
+
+# JSON-RPC request templates, built once and reused for every session.
+# Callers patch "id" right before sending; messages are serialized
+# immediately, so the next patch can't leak into them.
+_INITIALIZE_TMPL = {
+    "jsonrpc": "2.0",
+    "id": 0,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": MCP_PROTOCOL_VERSION,
+        "capabilities": {
+            "tools": {}
+        },
+        "clientInfo": {
+            "name": "universal-mcp-client",
+            "version": "1.0.0"
+        }
+    }
+}
+_INITIALIZED_NOTIFICATION = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+_TOOLS_LIST_TMPL = {"jsonrpc": "2.0", "id": 0, "method": "tools/list"}
+_RESOURCES_LIST_TMPL = {"jsonrpc": "2.0", "id": 0, "method": "resources/list"}
+_PROMPTS_LIST_TMPL = {"jsonrpc": "2.0", "id": 0, "method": "prompts/list"}
+
+# tools/call frames are assembled from bytes; only the params go through the encoder
+_TOOL_CALL_PREFIX = b'{"jsonrpc":"2.0","method":"tools/call","id":'
+
+# Quote and escape characters are the only input shlex.split() treats
+# specially (it expands no variables and, by default, keeps '#')
+_SHELL_SPECIAL = frozenset('\'"\\')
+# ...and these are the only characters it splits on (str.split() also breaks
+# on \x0b, \x0c, \xa0 and other Unicode whitespace)
+_SHELL_WHITESPACE = re.compile(r'[ \t\r\n]+')
+
+# Environment snapshot used as the base for STDIO servers that need overrides
+_BASE_ENV = os.environ.copy()
+
+# Readiness polling for STDIO server pipes (stdout and stderr are watched together).
+# Windows can only select() on sockets, so there each pipe gets a reader thread.
+PIPES_SELECTABLE = sys.platform != 'win32'
+_selector = selectors.DefaultSelector()
+PIPE_READ_SIZE = 65536
+STDERR_BUFFER_LIMIT = 65536  # Keep only the tail of a chatty server's stderr
+
+# Upper bound on HTTP requests in flight at once for a batch
+HTTP_MAX_CONCURRENCY = 8
+
+# Pretty-printed JSON content larger than this bypasses the result buffer
+LARGE_OUTPUT_BYTES = 1 << 20
+
+# Verbose logging shows at most this much of each frame sent or received
+VERBOSE_PREVIEW_BYTES = 4096
+
+# ANSI colors used by the result and capability printers; empty when stdout
+# isn't a terminal (or NO_COLOR is set) so piped output stays plain
+USE_COLOR = sys.stdout.isatty() and 'NO_COLOR' not in os.environ
+C_RED = "\033[31m" if USE_COLOR else ""
+C_GREEN = "\033[32m" if USE_COLOR else ""
+C_YELLOW = "\033[33m" if USE_COLOR else ""
+C_BLUE = "\033[34m" if USE_COLOR else ""
+C_MAGENTA = "\033[35m" if USE_COLOR else ""
+C_CYAN = "\033[36m" if USE_COLOR else ""
+C_WHITE = "\033[37m" if USE_COLOR else ""
+C_RESET = "\033[0m" if USE_COLOR else ""
+
+# Escape sequences left in non-JSON text content, undone in a single pass
+_UNESCAPE_RE = re.compile(r'\\[n"]')
+_UNESCAPE = {'\\n': '\n', '\\"': '"'}
+
+# Non-blank lines of text content, collected in one scan for indenting
+_NONBLANK_LINE = re.compile(r'^.*\S.*$', re.MULTILINE)
+
+# requests is only needed for HTTP servers, so it is imported on first use
+requests = None
+
+# sqlite3 backs the opt-in capability cache and is imported by CapabilityCache
+sqlite3 = None
+
+def import_requests():
+    """Import requests the first time an HTTP client needs it"""
+    global requests
+    if requests is None:
+        try:
+            import requests as requests_module
+        except ImportError:
+            print("✗ The requests library is required for HTTP servers: pip install requests")
+            sys.exit(1)
+        requests = requests_module
+    return requests
+
+def _dump_json_std(obj):
+    """Serialize obj to compact UTF-8 JSON bytes"""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _dump_json_pretty_std(obj):
+    """Serialize obj to indented UTF-8 JSON bytes"""
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# orjson holds integers in [-2**63, 2**64): anything outside has at least 19
+# digits (-9223372036854775809 is the shortest). Frames are checked for such a
+# run by folding every digit to '0' and searching for 19 zeros, which is much
+# faster than a regex over large frames; a long digit run inside a string just
+# costs a stdlib decode.
+_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_WIDE_NUMBER = b'0' * 19
+
+# Prefer orjson for JSON-RPC encode/decode, fall back to the standard library.
+# orjson is limited to 64-bit integers: it refuses to encode wider ones and
+# decodes them as floats, so those cases go through json instead. User input
+# (--tool, --env, config files) and tool result text always use json.loads.
 try:
-    import requests
+    import orjson
+
+    def dump_json(obj):
+        """Serialize obj to compact UTF-8 JSON bytes"""
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            return _dump_json_std(obj)
+
+    def dump_json_pretty(obj):
+        """Serialize obj to indented UTF-8 JSON bytes"""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            return _dump_json_pretty_std(obj)
+
+    def load_json(data):
+        """Decode a JSON-RPC frame (bytes) without rounding wide integers"""
+        if _WIDE_NUMBER in data.translate(_DIGITS_TO_ZERO):
+            return json.loads(data)
+        return orjson.loads(data)
 except ImportError:
-    print("Installing requests library...")
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'requests'])
-    import requests
+    orjson = None
+    dump_json = _dump_json_std
+    dump_json_pretty = _dump_json_pretty_std
+    load_json = json.loads
+
+def preview_frame(frame):
+    """Decode the head of an encoded JSON-RPC frame for verbose logging
+
+    Works on the bytes already on the wire, so logging never re-serializes
+    a message and giant payloads are cut off at VERBOSE_PREVIEW_BYTES.
+    """
+    if len(frame) <= VERBOSE_PREVIEW_BYTES:
+        return frame.decode('utf-8', errors='replace')
+    head = frame[:VERBOSE_PREVIEW_BYTES].decode('utf-8', errors='replace')
+    return f"{head}... [{len(frame)} bytes]"
+
+def write_bytes(data):
+    """Write UTF-8 output in one call, bypassing the text layer when possible"""
+    sys.stdout.flush()  # Keep ordering with anything print() has buffered
+    stream = getattr(sys.stdout, 'buffer', None)
+    if stream is None:
+        sys.stdout.write(data.decode('utf-8', errors='replace'))
+        sys.stdout.flush()
+        return
+    stream.write(data)
+    stream.flush()
+
+def _display_text(out, i, content_item):
+    """Append a text content item, pretty-printing it if it holds JSON"""
+    text_content = content_item.get("text", "")
+    out += f"  {C_CYAN}Content {i} (text):{C_RESET}\n".encode('utf-8')
+    
+    # Try to parse as JSON first
+    try:
+        pretty_json = dump_json_pretty(json.loads(text_content))
+    except json.JSONDecodeError:
+        # Not JSON, display as formatted text
+        # Turn literal \n and \" escapes back into characters; other backslashes
+        # (Windows paths and the like) are shown as sent
+        formatted_text = _UNESCAPE_RE.sub(lambda m: _UNESCAPE[m.group(0)], text_content)
+        lines = _NONBLANK_LINE.findall(formatted_text)
+        if lines:
+            out += ("    " + "\n    ".join(lines) + "\n").encode('utf-8')
+        return
+    
+    if len(pretty_json) > LARGE_OUTPUT_BYTES:
+        # Write big documents straight through instead of copying them into out
+        write_bytes(out)
+        out.clear()
+        write_bytes(pretty_json + b"\n")
+    else:
+        out += pretty_json
+        out += b"\n"
+
+def _display_image(out, i, content_item):
+    """Append an image content item (metadata only)"""
+    out += (
+        f"  {C_YELLOW}Content {i} (image):{C_RESET}\n"
+        f"    Image data available (type: {content_item.get('mimeType', 'unknown')})\n"
+    ).encode('utf-8')
+
+def _display_resource(out, i, content_item):
+    """Append an embedded resource content item"""
+    out += (
+        f"  {C_BLUE}Content {i} (resource):{C_RESET}\n"
+        f"    Resource: {content_item.get('resource', {}).get('uri', 'unknown')}\n"
+    ).encode('utf-8')
+
+def _display_unknown(out, i, content_item):
+    """Append a content item of a type we don't know how to render"""
+    out += (
+        f"  {C_WHITE}❓ Content {i} (type: {content_item.get('type', 'unknown')}):{C_RESET}\n"
+        f"    {content_item}\n"
+    ).encode('utf-8')
+
+# Content type -> renderer used by display_mcp_result
+CONTENT_HANDLERS = {
+    "text": _display_text,
+    "image": _display_image,
+    "resource": _display_resource,
+}
 
 def display_mcp_result(response, title="Result"):
     """Display MCP tool response in a nicely formatted way"""
@@ -28,49 +245,21 @@ def display_mcp_result(response, title="Result"):
     
     # Check if it's an error
     is_error = result.get("isError", False)
-    status_color = "\033[31m" if is_error else "\033[32m"  # Red for error, green for success
+    status_color = C_RED if is_error else C_GREEN
     status_symbol = "✗" if is_error else "✓"
     
-    print(f"{status_color}{status_symbol} {title}:\033[0m")
+    # Collect all output as UTF-8 and write it once at the end
+    out = bytearray(f"{status_color}{status_symbol} {title}:{C_RESET}\n".encode('utf-8'))
     
     # Process content array
     if "content" in result:
-        for i, content_item in enumerate(result["content"]):
-            content_type = content_item.get("type", "unknown")
-            
-            if content_type == "text":
-                text_content = content_item.get("text", "")
-                
-                # Try to parse as JSON first
-                try:
-                    parsed_json = json.loads(text_content)
-                    print(f"  \033[36mContent {i+1} (text):\033[0m")
-                    print(json.dumps(parsed_json, indent=4))
-                except json.JSONDecodeError:
-                    # Not JSON, display as formatted text
-                    print(f"  \033[36mContent {i+1} (text):\033[0m")
-                    # Replace \n with actual newlines and clean up
-                    formatted_text = text_content.replace('\\n', '\n').replace('\\"', '"')
-                    for line in formatted_text.split('\n'):
-                        if line.strip():  # Skip empty lines
-                            print(f"    {line}")
-            
-            elif content_type == "image":
-                print(f"  \033[33mContent {i+1} (image):\033[0m")
-                print(f"    Image data available (type: {content_item.get('mimeType', 'unknown')})")
-            
-            elif content_type == "resource":
-                print(f"  \033[34mContent {i+1} (resource):\033[0m")
-                print(f"    Resource: {content_item.get('resource', {}).get('uri', 'unknown')}")
-            
-            else:
-                print(f"  \033[37m❓ Content {i+1} (type: {content_type}):\033[0m")
-                print(f"    {content_item}")
-    
+        for i, content_item in enumerate(result["content"], 1):
+            CONTENT_HANDLERS.get(content_item.get("type"), _display_unknown)(out, i, content_item)
     else:
-        print("  \033[37mNo content in response\033[0m")
+        out += f"  {C_WHITE}No content in response{C_RESET}\n".encode('utf-8')
     
-    print()  # Add spacing after result
+    out += b"\n"  # Add spacing after result
+    write_bytes(out)
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -109,9 +298,26 @@ def parse_arguments():
                        help='Only list capabilities, do not execute tools')
     parser.add_argument('--verbose', action='store_true',
                        help='Show all protocol messages')
+    
+    # Capability caching
+    parser.add_argument('--capability-cache', nargs='?', const=DEFAULT_CAPABILITY_CACHE,
+                       metavar='PATH',
+                       help=f'Cache tools/resources/prompts listings in SQLite (default: {DEFAULT_CAPABILITY_CACHE})')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL,
+                       help=f'Seconds before cached listings expire (default: {DEFAULT_CACHE_TTL})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Ignore cached listings and refresh them from the server')
 
     return parser.parse_args()
 
+@functools.lru_cache(maxsize=256)
+def _load_json_arg(raw):
+    """Decode a JSON command line value, memoized by the raw string.
+
+    Results are shared between calls, so callers must not mutate them.
+    """
+    return json.loads(raw)
+
 def parse_env_variables(args):
     """Parse environment variables from arguments"""
     env_vars = {}
@@ -119,12 +325,16 @@ def parse_env_variables(args):
     # Load from file if specified
     if args.env_file:
         try:
-            with open(args.env_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key.strip()] = value.strip()
+            with open(args.env_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+            # One read, then KEY=VALUE pairs via str.partition; blank lines,
+            # '#' comments and lines without a key are skipped
+            pairs = (line.partition('=') for line in text.splitlines())
+            env_vars.update(
+                (key.strip(), value.strip())
+                for key, sep, value in pairs
+                if sep and key.strip() and not key.lstrip().startswith('#')
+            )
         except FileNotFoundError:
             print(f"✗ Environment file not found: {args.env_file}")
             sys.exit(1)
@@ -134,7 +344,7 @@ def parse_env_variables(args):
         for env_arg in args.env:
             # Try to parse as JSON first
             try:
-                json_env = json.loads(env_arg)
+                json_env = _load_json_arg(env_arg)
                 if isinstance(json_env, dict):
                     env_vars.update(json_env)
                     continue
@@ -142,8 +352,8 @@ def parse_env_variables(args):
                 pass
             
             # Parse as KEY=VALUE
-            if '=' in env_arg:
-                key, value = env_arg.split('=', 1)
+            key, sep, value = env_arg.partition('=')
+            if sep:
                 env_vars[key.strip()] = value.strip()
             else:
                 print(f"✗ Invalid environment variable format: {env_arg}")
@@ -158,7 +368,7 @@ def parse_tools(args):
     if args.tool:
         for tool_str in args.tool:
             try:
-                tool_data = json.loads(tool_str)
+                tool_data = _load_json_arg(tool_str)
                 if isinstance(tool_data, list):
                     tools.extend(tool_data)
                 else:
@@ -175,18 +385,14 @@ def interactive_tool_selection(available_tools):
         print("No tools available for interactive selection.")
         return []
     
-    print("\n🎯 Interactive Tool Selection")
-    print("=" * 50)
-    
-    # Display numbered list of tools
+    # Display numbered list of tools in a single write
+    out = ["\n🎯 Interactive Tool Selection", "=" * 50]
     for i, tool in enumerate(available_tools, 1):
-        tool_name = f"\033[36m{tool['name']}\033[0m"
-        description = f"\033[37m{tool.get('description', 'No description')}\033[0m"
-        print(f"{i:2d}. {tool_name}")
-        print(f"    {description}")
-    
-    print("\nSelect tools by entering numbers (e.g., '1,3,5' or '1-3' or 'all'):")
-    print("Press ENTER with no input to skip tool execution")
+        out.append(f"{i:2d}. {C_CYAN}{tool['name']}{C_RESET}")
+        out.append(f"    {C_WHITE}{tool.get('description', 'No description')}{C_RESET}")
+    out.append("\nSelect tools by entering numbers (e.g., '1,3,5' or '1-3' or 'all'):")
+    out.append("Press ENTER with no input to skip tool execution")
+    sys.stdout.write("\n".join(out) + "\n")
     
     while True:
         try:
@@ -196,10 +402,12 @@ def interactive_tool_selection(available_tools):
                 print("No tools selected.")
                 return []
             
-            selected_indices = []
+            # Selected tools are bits of an int: bit i set means tool i+1 was picked
+            all_tools = (1 << len(available_tools)) - 1
+            mask = 0
             
             if selection.lower() == 'all':
-                selected_indices = list(range(len(available_tools)))
+                mask = all_tools
             else:
                 # Parse selection (support commas and ranges)
                 parts = selection.split(',')
@@ -208,13 +416,22 @@ def interactive_tool_selection(available_tools):
                     if '-' in part:
                         # Range like "1-3"
                         start, end = map(int, part.split('-'))
-                        selected_indices.extend(range(start-1, end))
+                        # Clamp before shifting so "1-999999" can't build a huge int
+                        start = max(start, 1)
+                        end = min(end, len(available_tools))
+                        if end >= start:
+                            mask |= (1 << end) - (1 << (start - 1))
                     else:
                         # Single number
-                        selected_indices.append(int(part) - 1)
+                        number = int(part)
+                        if 1 <= number <= len(available_tools):
+                            mask |= 1 << (number - 1)
             
-            # Validate indices
-            selected_indices = [i for i in selected_indices if 0 <= i < len(available_tools)]
+            selected_indices = []
+            while mask:
+                low_bit = mask & -mask
+                selected_indices.append(low_bit.bit_length() - 1)
+                mask ^= low_bit
             if not selected_indices:
                 print("No valid tools selected. Please try again.")
                 continue
@@ -231,7 +448,7 @@ def interactive_tool_selection(available_tools):
         tool = available_tools[index]
         tool_name = tool['name']
         
-        print(f"\n📝 Configure tool: \033[36m{tool_name}\033[0m")
+        print(f"\n📝 Configure tool: {C_CYAN}{tool_name}{C_RESET}")
         schema = tool.get('inputSchema', {})
         properties = schema.get('properties', {})
         required = schema.get('required', [])
@@ -285,29 +502,46 @@ class HttpMcpClient:
             'Accept': 'application/json',
             **self.headers
         }
+        import_requests()
+        from requests.adapters import HTTPAdapter
+        from urllib3.util import Retry
+        
+        # One keep-alive session for every JSON-RPC message; only connection
+        # failures are retried, since a tools/call POST may not be idempotent
+        self.session = requests.Session()
+        self.session.headers.update(self.session_headers)
+        retries = HTTPAdapter(max_retries=Retry(connect=2, read=0, backoff_factor=0.5))
+        self.session.mount('http://', retries)
+        self.session.mount('https://', retries)
+        
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
         
     def send_request(self, message):
-        """Send HTTP request to MCP server"""
+        """Send HTTP request to MCP server (message may already be encoded bytes)"""
         try:
+            # Encode once; the same bytes are logged and sent, and requests
+            # doesn't run the body through stdlib json
+            body = message if isinstance(message, bytes) else dump_json(message)
             if self.verbose:
                 print(f"→ HTTP POST {self.base_url}")
                 print(f"→ Headers: {json.dumps(self.session_headers, indent=2)}")
-                print(f"→ Body: {json.dumps(message, indent=2)}")
+                print(f"→ Body: {preview_frame(body)}")
             
             # Use the URL exactly as provided - don't append /mcp
-            response = requests.post(
+            response = self.session.post(
                 self.base_url,
-                json=message,
-                headers=self.session_headers,
+                data=body,
                 timeout=30
             )
             
             if self.verbose:
                 print(f"← HTTP {response.status_code}")
-                print(f"← {response.text}")
+                print(f"← {preview_frame(response.content)}")
             
             response.raise_for_status()  # Raise exception for bad status codes
-            return response.json()
+            return load_json(response.content)
                 
         except requests.exceptions.RequestException as e:
             print(f"✗ HTTP Request Error: {e}")
@@ -319,12 +553,16 @@ class HttpMcpClient:
             print(f"✗ Unexpected error: {e}")
             return None
 
+@functools.lru_cache(maxsize=4)
 def is_http_server(server_command):
     """Check if server command is an HTTP URL"""
+    # Cheap prefix test first so STDIO commands never pay for urlparse
+    if not server_command.lstrip()[:8].lower().startswith(('http://', 'https://')):
+        return False
     try:
         parsed = urlparse(server_command)
-        return parsed.scheme in ('http', 'https') and parsed.netloc
-    except:
+        return parsed.scheme in ('http', 'https') and bool(parsed.netloc)
+    except ValueError:
         return False
 
 def create_mcp_client(server_command, env_vars=None, verbose=False):
@@ -354,21 +592,42 @@ def create_http_client(base_url, env_vars=None, verbose=False):
     client = HttpMcpClient(base_url, headers, verbose)
     return client, verbose
 
+@functools.lru_cache(maxsize=64)
+def split_command(server_command):
+    """Tokenize a server command, skipping shlex when there is nothing to unquote"""
+    if _SHELL_SPECIAL.isdisjoint(server_command):
+        return tuple(filter(None, _SHELL_WHITESPACE.split(server_command)))
+    return tuple(shlex.split(server_command))
+
+def refresh_base_env():
+    """Re-snapshot os.environ after it has been changed at runtime"""
+    global _BASE_ENV
+    _BASE_ENV = os.environ.copy()
+
 def create_stdio_client(server_command, env_vars=None, verbose=False):
     """Create STDIO-based MCP client"""
     
     # Parse server command
     try:
-        cmd_parts = shlex.split(server_command)
+        cmd_parts = list(split_command(server_command))
     except ValueError as e:
         print(f"✗ Invalid server command: {e}")
         sys.exit(1)
     
-    # Prepare environment
-    full_env = {**os.environ}
+    # Prepare environment - with no overrides the child simply inherits ours
+    full_env = None
     if env_vars:
+        full_env = _BASE_ENV.copy()
         full_env.update(env_vars)
     
+    # CPython only takes its posix_spawn() fast path for an explicit program
+    # path, so resolve bare names ("npx") the same way Popen would. Windows
+    # has no such path, and which() there would hand CreateProcess "npx.CMD".
+    if os.name == 'posix' and cmd_parts and not os.path.dirname(cmd_parts[0]):
+        resolved = shutil.which(cmd_parts[0], path=os.pathsep.join(os.get_exec_path(full_env)))
+        if resolved:
+            cmd_parts[0] = resolved
+    
     if verbose:
         print(f"🔧 Starting server: {' '.join(cmd_parts)}")
         if env_vars:
@@ -381,10 +640,26 @@ def create_stdio_client(server_command, env_vars=None, verbose=False):
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            bufsize=65536,  # Binary, block-buffered pipes; JSON-RPC frames are UTF-8 bytes
+            close_fds=os.name != 'posix',  # False allows posix_spawn() instead of fork()+exec(); our own fds are non-inheritable
             env=full_env
         )
+        # Reads go through _selector on the raw fds (or reader threads on Windows);
+        # partial lines and stderr output accumulate in these buffers between
+        # read_response calls
+        proc.stdout_buffer = bytearray()
+        proc.stdout_scanned = 0  # Bytes of stdout_buffer already searched for a newline
+        proc.stderr_buffer = bytearray()
+        pipes = ((proc.stdout, proc.stdout_buffer, None),
+                 (proc.stderr, proc.stderr_buffer, STDERR_BUFFER_LIMIT))
+        if PIPES_SELECTABLE:
+            for pipe, buffer, limit in pipes:
+                _selector.register(pipe, selectors.EVENT_READ, (buffer, limit))
+        else:
+            proc.pipe_ready = threading.Condition()
+            proc.closed_pipes = set()
+            for pipe, buffer, limit in pipes:
+                threading.Thread(target=_drain_pipe, args=(proc, pipe, buffer, limit), daemon=True).start()
         return proc, verbose
     except FileNotFoundError as e:
         print(f"✗ Failed to start server: {e}")
@@ -397,31 +672,169 @@ def send_message(client, message, verbose=False):
         pass  
     else:
         # STDIO client
-        message_json = json.dumps(message) + '\n'
+        frame = dump_json(message)
         if verbose:
-            print(f"→ {json.dumps(message, indent=2)}")
-        client.stdin.write(message_json)
+            print(f"→ {preview_frame(frame)}")
+        # Two writes into the pipe's buffer still leave as one syscall on flush,
+        # without copying the whole frame just to append the newline
+        client.stdin.write(frame)
+        client.stdin.write(b'\n')
         client.stdin.flush()
 
-def read_response(client, verbose=False):
-    """Read response from MCP server (works with both STDIO and HTTP clients)"""
+def poll_pipes(timeout=None):
+    """Wait for STDIO server output and append it to the per-pipe buffers.
+
+    Returns False if nothing became readable before the timeout.
+    """
+    events = _selector.select(timeout)
+    for key, _ in events:
+        if key.data is None:
+            continue  # A stdin registered by write_frames became writable
+        chunk = os.read(key.fd, PIPE_READ_SIZE)
+        if not chunk:
+            _selector.unregister(key.fileobj)  # EOF
+            continue
+        buffer, limit = key.data
+        buffer.extend(chunk)
+        if limit and len(buffer) > limit:
+            del buffer[:-limit]
+    return bool(events)
+
+def _drain_pipe(client, pipe, buffer, limit):
+    """Reader thread body used where pipes can't be polled (Windows)"""
+    while True:
+        try:
+            chunk = pipe.read1(PIPE_READ_SIZE)
+        except (OSError, ValueError):
+            chunk = b''  # Pipe closed during cleanup
+        with client.pipe_ready:
+            if not chunk:
+                client.closed_pipes.add(pipe)
+                client.pipe_ready.notify_all()
+                return
+            buffer.extend(chunk)
+            if limit and len(buffer) > limit:
+                del buffer[:-limit]
+            client.pipe_ready.notify_all()
+
+def stdout_open(client):
+    """Whether the STDIO server's stdout may still produce data"""
+    if PIPES_SELECTABLE:
+        return client.stdout in _selector.get_map()
+    return client.stdout not in client.closed_pipes
+
+def wait_for_output(client, timeout=None):
+    """Wait for more output from a STDIO server.
+
+    Returns False if nothing arrived before the timeout.
+    """
+    if PIPES_SELECTABLE:
+        return poll_pipes(timeout)
+
+    def line_ready():
+        # Only search bytes added since the last check, as read_response does
+        size = len(client.stdout_buffer)
+        if client.stdout_buffer.find(b'\n', client.stdout_scanned, size) != -1:
+            return True
+        client.stdout_scanned = size
+        return not stdout_open(client)
+
+    with client.pipe_ready:
+        return client.pipe_ready.wait_for(line_ready, timeout)
+
+def write_frames(client, data):
+    """Write a batch of frames to a STDIO server while draining its output.
+
+    A single blocking write larger than the pipe can stall for good: the
+    server stops reading stdin once its own stdout pipe is full, and nobody
+    empties that pipe until the write returns. stdin is made non-blocking
+    for the duration, and replies are buffered whenever it is full.
+    """
+    if not PIPES_SELECTABLE:
+        # Reader threads keep the server's output flowing during a blocking write
+        client.stdin.write(data)
+        client.stdin.flush()
+        return
+    client.stdin.flush()
+    fd = client.stdin.fileno()
+    view = memoryview(data)
+    os.set_blocking(fd, False)
+    _selector.register(client.stdin, selectors.EVENT_WRITE, None)
+    try:
+        while view:
+            try:
+                view = view[os.write(fd, view):]
+            except BlockingIOError:
+                pass
+            if view:
+                poll_pipes()
+    finally:
+        _selector.unregister(client.stdin)
+        os.set_blocking(fd, True)
+
+def read_response(client, verbose=False, timeout=None, skip_invalid=False):
+    """Read response from MCP server (works with both STDIO and HTTP clients)
+
+    With skip_invalid, lines that aren't a JSON object (server debug output
+    and the like) are passed over, so None only means EOF or timeout.
+    """
     if hasattr(client, 'send_request'):
         # HTTP client - response already handled in send_request
         return None  # HTTP responses are handled synchronously
-    else:
-        # STDIO client
-        try:
-            line = client.stdout.readline()
-            if not line:
-                return None
-            response = json.loads(line.strip())
+
+    # STDIO client - stderr is drained while we wait so the server never blocks on it
+    buffer = client.stdout_buffer
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        # Resume the newline search where the last one stopped, so a large
+        # frame arriving in many chunks is scanned once rather than per chunk
+        size = len(buffer)
+        end = buffer.find(b'\n', client.stdout_scanned, size)
+        if end == -1:
+            client.stdout_scanned = size
+        else:
+            client.stdout_scanned = 0
+            line = bytes(buffer[:end + 1])
+            del buffer[:end + 1]
+            if line.isspace():
+                continue  # Blank line; load_json copes with the trailing newline itself
+            try:
+                response = load_json(line)
+            except json.JSONDecodeError:
+                if not skip_invalid:
+                    return None
+                response = None
+            if skip_invalid and not isinstance(response, dict):
+                if verbose:
+                    print(f"← (skipped) {preview_frame(line.rstrip())}")
+                continue
             if verbose:
-                print(f"← {json.dumps(response, indent=2)}")
+                print(f"← {preview_frame(line.rstrip())}")
             return response
-        except json.JSONDecodeError:
-            return None
-        except Exception:
-            return None
+
+        if not stdout_open(client):
+            return None  # Server closed stdout
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        if not wait_for_output(client, remaining):
+            return None  # Timed out
+
+def read_server_stderr(client):
+    """Collect whatever the STDIO server has written to stderr so far"""
+    if not hasattr(client, 'stderr_buffer'):
+        return ""
+    if not PIPES_SELECTABLE:
+        with client.pipe_ready:
+            return client.stderr_buffer.decode('utf-8', errors='replace')
+    while client.stderr in _selector.get_map() and poll_pipes(0):
+        pass
+    return client.stderr_buffer.decode('utf-8', errors='replace')
+
+def release_pipes(client):
+    """Stop polling a STDIO server's pipes so their fds can be reused safely"""
+    registered = _selector.get_map()
+    for pipe in (getattr(client, 'stdout', None), getattr(client, 'stderr', None)):
+        if pipe is not None and pipe in registered:
+            _selector.unregister(pipe)
 
 def send_and_receive(client, message, verbose=False):
     """Send message and receive response (unified interface for STDIO and HTTP)"""
@@ -433,7 +846,116 @@ def send_and_receive(client, message, verbose=False):
         send_message(client, message, verbose)
         return read_response(client, verbose)
 
-def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
+def tool_call_frames(tools, first_id):
+    """Yield (id, frame) pairs of pre-encoded tools/call requests with consecutive ids"""
+    for message_id, tool_spec in enumerate(tools, first_id):
+        yield message_id, b'%s%d,"params":%s}' % (_TOOL_CALL_PREFIX, message_id, dump_json(tool_spec))
+
+def send_batch(client, messages, verbose=False):
+    """Send several requests before reading any reply; returns responses keyed by id
+
+    Messages are dicts or (id, frame) pairs that are already encoded, such
+    as those from tool_call_frames(). Notifications (messages without an id)
+    are written in the same frame batch but never waited on.
+    """
+    encoded = (
+        message if isinstance(message, tuple) else (message.get("id"), message)
+        for message in messages
+    )
+    
+    if hasattr(client, 'send_request'):
+        # HTTP client - notifications are skipped, as in send_message. Requests
+        # are encoded up front, then posted concurrently on the shared session;
+        # verbose runs stay sequential so their logs don't interleave.
+        batch = [
+            (message_id, message if isinstance(message, bytes) else dump_json(message))
+            for message_id, message in encoded if message_id is not None
+        ]
+        if len(batch) < 2 or client.verbose:
+            return {message_id: client.send_request(body) for message_id, body in batch}
+        from concurrent.futures import ThreadPoolExecutor  # Only this path needs it; keeps startup lean
+        with ThreadPoolExecutor(max_workers=min(len(batch), HTTP_MAX_CONCURRENCY)) as pool:
+            replies = pool.map(client.send_request, [body for _, body in batch])
+            return {message_id: reply for (message_id, _), reply in zip(batch, replies)}
+
+    # STDIO client - submit everything in one write pass, then reap replies as they arrive
+    pending = set()
+    frames = []
+    for message_id, message in encoded:
+        frame = message if isinstance(message, bytes) else dump_json(message)
+        if verbose:
+            print(f"→ {preview_frame(frame)}")
+        frames.append(frame)
+        frames.append(b'\n')
+        if message_id is not None:
+            pending.add(message_id)
+    write_frames(client, b''.join(frames))
+
+    responses = {}
+    while pending:
+        response = read_response(client, verbose, skip_invalid=True)
+        if response is None:
+            break  # Server closed the pipe
+        response_id = response.get("id")
+        if response_id in pending and "method" not in response:
+            pending.discard(response_id)
+            responses[response_id] = response
+    return responses
+
+class CapabilityCache:
+    """SQLite cache of list responses, keyed by server, protocol version and method"""
+    
+    def __init__(self, path, server, ttl=DEFAULT_CACHE_TTL, refresh=False, verbose=False):
+        self.path = path
+        self.server = server
+        self.ttl = ttl
+        self.refresh = refresh  # Skip reads but still store fresh listings
+        self.verbose = verbose
+        
+    def _connect(self):
+        # Imported on first use: the cache is opt-in and sqlite3 costs every
+        # start a few ms. Bound globally for the except clauses in load/store.
+        global sqlite3
+        import sqlite3
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS capabilities ("
+            "server TEXT, protocol_version TEXT, method TEXT, stored_at REAL, response BLOB, "
+            "PRIMARY KEY (server, protocol_version, method))"
+        )
+        return db
+        
+    def load(self):
+        """Return unexpired cached responses as {method: response}"""
+        if self.refresh:
+            return {}
+        try:
+            with closing(self._connect()) as db:
+                rows = db.execute(
+                    "SELECT method, response FROM capabilities "
+                    "WHERE server = ? AND protocol_version = ? AND stored_at >= ?",
+                    (self.server, MCP_PROTOCOL_VERSION, time.time() - self.ttl)
+                ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            if self.verbose:
+                print(f"✗ Capability cache unavailable: {e}")
+            return {}
+        return {method: load_json(response) for method, response in rows}
+        
+    def store(self, method, response):
+        """Remember a successful list response"""
+        try:
+            with closing(self._connect()) as db, db:
+                db.execute(
+                    "INSERT OR REPLACE INTO capabilities VALUES (?, ?, ?, ?, ?)",
+                    (self.server, MCP_PROTOCOL_VERSION, method, time.time(), dump_json(response))
+                )
+        except (sqlite3.Error, OSError) as e:
+            if self.verbose:
+                print(f"✗ Could not update capability cache: {e}")
+
+def run_mcp_session(client, verbose, tools_to_test, list_only, interactive, capability_cache=None):
     """Run an MCP session with capability discovery and tool execution"""
     message_id = 1
     
@@ -441,37 +963,25 @@ def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
     print("🔗 Initializing MCP session...")
     
     # Send initialization message
-    init_message = {
-        "jsonrpc": "2.0",
-        "id": message_id,
-        "method": "initialize",
-        "params": {
-            "protocolVersion": MCP_PROTOCOL_VERSION,
-            "capabilities": {
-                "tools": {}
-            },
-            "clientInfo": {
-                "name": "universal-mcp-client",
-                "version": "1.0.0"
-            }
-        }
-    }
-
-    init_response = send_and_receive(client, init_message, verbose)
+    _INITIALIZE_TMPL["id"] = message_id
+    init_response = send_and_receive(client, _INITIALIZE_TMPL, verbose)
     message_id += 1
 
     if not init_response or "result" not in init_response:
         print("✗ Failed to initialize MCP session")
+        server_stderr = read_server_stderr(client).strip()
+        if server_stderr:
+            print("  Server stderr:")
+            for line in server_stderr.splitlines():
+                print(f"    {line}")
         return False
 
     print("✓ MCP session initialized")
 
-    # Send initialized notification
-    initialized_message = {
-        "jsonrpc": "2.0",
-        "method": "notifications/initialized"
-    }
-    send_message(client, initialized_message, verbose)  # Notifications don't expect responses
+    # The initialized notification goes out in the same write as the first
+    # batch of requests. Those requests can't join the initialize round-trip:
+    # they have to wait for its reply, and 2025-06-18 dropped JSON-RPC batches.
+    preamble = [_INITIALIZED_NOTIFICATION]
 
     # Only discover capabilities in list-only mode
     available_tools = []
@@ -479,37 +989,47 @@ def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
         # List capabilities
         print("\n🔍 Discovering server capabilities...")
 
-        # List tools
-        list_tools_message = {
-            "jsonrpc": "2.0",
-            "id": message_id,
-            "method": "tools/list"
-        }
-        tools_response = send_and_receive(client, list_tools_message, verbose)
-        message_id += 1
+        listings = capability_cache.load() if capability_cache else {}
+        if listings:
+            print(f"✓ Using cached listings for: {', '.join(sorted(listings))} (--no-cache to refresh)")
+
+        # Pipeline whichever of tools, resources and prompts listing isn't cached in one submission
+        missing = [
+            template for template in (_TOOLS_LIST_TMPL, _RESOURCES_LIST_TMPL, _PROMPTS_LIST_TMPL)
+            if template["method"] not in listings
+        ]
+        if missing:
+            for offset, template in enumerate(missing):
+                template["id"] = message_id + offset
+            responses = send_batch(client, [*preamble, *missing], verbose)
+            preamble.clear()
+            message_id += len(missing)
+            
+            for template in missing:
+                response = responses.get(template["id"])
+                listings[template["method"]] = response
+                if capability_cache and response and "result" in response:
+                    capability_cache.store(template["method"], response)
+
+        tools_response = listings["tools/list"]
+        resources_response = listings["resources/list"]
+        prompts_response = listings["prompts/list"]
 
         if tools_response and "result" in tools_response:
             available_tools = tools_response["result"]["tools"]
             if available_tools:
-                print("✓ Available tools:")
-                for tool in available_tools:
-                    tool_name = f"\033[36m{tool['name']}\033[0m"  # Cyan
-                    description = f"\033[35m{tool.get('description', 'No description available')}\033[0m"  # Magenta
-                    print(f"  • {tool_name}: {description}")
+                out = ["✓ Available tools:"]
+                out.extend(
+                    f"  • {C_CYAN}{tool['name']}{C_RESET}: "
+                    f"{C_MAGENTA}{tool.get('description', 'No description available')}{C_RESET}"
+                    for tool in available_tools
+                )
+                sys.stdout.write("\n".join(out) + "\n")
             else:
                 print("✓ No tools available")
         else:
             print("✗ Failed to list tools")
 
-        # List resources
-        list_resources_message = {
-            "jsonrpc": "2.0",
-            "id": message_id,
-            "method": "resources/list"
-        }
-        resources_response = send_and_receive(client, list_resources_message, verbose)
-        message_id += 1
-
         if resources_response and "result" in resources_response:
             resources = resources_response["result"]["resources"]
             if resources:
@@ -519,15 +1039,6 @@ def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
         else:
             print("✗ Failed to list resources")
 
-        # List prompts
-        list_prompts_message = {
-            "jsonrpc": "2.0",
-            "id": message_id,
-            "method": "prompts/list"
-        }
-        prompts_response = send_and_receive(client, list_prompts_message, verbose)
-        message_id += 1
-
         if prompts_response and "result" in prompts_response:
             prompts = prompts_response["result"]["prompts"]
             if prompts:
@@ -540,13 +1051,16 @@ def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
     # Interactive tool selection (only if not list_only and interactive)
     elif interactive:
         # Need to get tools for interactive mode
-        list_tools_message = {
-            "jsonrpc": "2.0",
-            "id": message_id,
-            "method": "tools/list"
-        }
-        tools_response = send_and_receive(client, list_tools_message, verbose)
-        message_id += 1
+        tools_response = None
+        if capability_cache:
+            tools_response = capability_cache.load().get("tools/list")
+        if tools_response is None:
+            _TOOLS_LIST_TMPL["id"] = message_id
+            tools_response = send_batch(client, [*preamble, _TOOLS_LIST_TMPL], verbose).get(message_id)
+            preamble.clear()
+            message_id += 1
+            if capability_cache and tools_response and "result" in tools_response:
+                capability_cache.store("tools/list", tools_response)
 
         if tools_response and "result" in tools_response:
             available_tools = tools_response["result"]["tools"]
@@ -561,29 +1075,32 @@ def run_mcp_session(client, verbose, tools_to_test, list_only, interactive):
     if not list_only and tools_to_test:
         print("\n🔧 Executing requested tools...")
         
-        for i, tool_spec in enumerate(tools_to_test):
+        # Submit every call up front, then report results in request order
+        first_id = message_id
+        message_id += len(tools_to_test)
+        responses = send_batch(
+            client,
+            itertools.chain(preamble, tool_call_frames(tools_to_test, first_id)),
+            verbose
+        )
+        preamble.clear()
+
+        for response_id, tool_spec in enumerate(tools_to_test, first_id):
             tool_name = tool_spec.get("name", "unknown")
             print(f"\n📋 Testing tool: {tool_name}")
-            
-            tool_message = {
-                "jsonrpc": "2.0",
-                "id": message_id,
-                "method": "tools/call",
-                "params": tool_spec
-            }
-            
-            tool_response = send_and_receive(client, tool_message, verbose)
-            message_id += 1
-            
-            display_mcp_result(tool_response, f"Tool: {tool_name}")
+            display_mcp_result(responses.get(response_id), f"Tool: {tool_name}")
+
+    # Nothing else was sent, but the server still expects the notification
+    if preamble:
+        send_message(client, _INITIALIZED_NOTIFICATION, verbose)
 
     return True
 
 def load_config_file(config_path):
     """Load configuration from JSON file"""
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
+        with open(config_path, 'rb') as f:
+            config = json.loads(f.read())
         return config
     except FileNotFoundError:
         print(f"✗ Configuration file not found: {config_path}")
@@ -627,6 +1144,9 @@ def merge_config_with_args(args):
         'verbose': options.get('verbose', args.verbose),
         'list_only': options.get('list_only', args.list_only),
         'interactive': options.get('interactive', args.interactive),
+        'capability_cache': options.get('capability_cache', args.capability_cache),
+        'cache_ttl': options.get('cache_ttl', args.cache_ttl),
+        'no_cache': options.get('no_cache', args.no_cache),
     }
     
     return {
@@ -669,13 +1189,26 @@ def main():
             else:
                 print(f"🔐 Environment variables: {list(config['env_vars'].keys())}")
         
+        # Capability cache is opt-in; "capability_cache": true in a config file means the default path
+        capability_cache = None
+        cache_path = config['options']['capability_cache']
+        if cache_path:
+            capability_cache = CapabilityCache(
+                DEFAULT_CAPABILITY_CACHE if cache_path is True else os.path.expanduser(cache_path),
+                config['server'],
+                config['options']['cache_ttl'],
+                refresh=config['options']['no_cache'],
+                verbose=config['options']['verbose']
+            )
+        
         # Run the session
         success = run_mcp_session(
             client, 
             config['options']['verbose'], 
             config['tools'], 
             config['options']['list_only'], 
-            config['options']['interactive']
+            config['options']['interactive'],
+            capability_cache
         )
         
         if not success:
@@ -691,8 +1224,11 @@ def main():
         # Clean up
         if client:
             try:
-                # Only terminate STDIO processes (HTTP clients don't need cleanup)
+                # HTTP clients close their connection pool, STDIO processes are terminated
+                if hasattr(client, 'close'):
+                    client.close()
                 if hasattr(client, 'terminate'):
+                    release_pipes(client)
                     client.terminate()
                     client.wait(timeout=5)
             except: